@@ -1,2 +1,17 @@
 __author__ = 'ByteDream'
 __version__ = '0.1.1'
+
+# submodules are only imported when they are accessed the first time (e.g. `dreamutils.net`),
+# so `import dreamutils` stays cheap for short living scripts
+_submodules = ['encoding', 'file', 'net', 'os', 'python', 'sort', 'types']
+
+
+def __getattr__(name: str):
+    if name in _submodules:
+        from importlib import import_module as _import_module
+        return _import_module('.' + name, __name__)
+    raise AttributeError('module \'' + __name__ + '\' has no attribute \'' + name + '\'')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_submodules))
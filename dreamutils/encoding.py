@@ -1,6 +1,150 @@
 #!/usr/bin/python3
 
+import codecs as _codecs
+import re as _re
+from functools import lru_cache as _lru_cache
+from typing import Iterable as _Iterable, Iterator as _Iterator, Tuple as _Tuple, Union as _Union
+
+"""This file contains encoding names and utils to detect and handle encodings"""
+
 ASCII = 'ascii'
 
 UTF_8 = 'utf-8'
 UTF_16 = 'utf-16'
+
+# the byte order marks, utf-32 before utf-16 because the utf-32-le bom starts with the utf-16-le bom
+_BOMS = [
+    (_codecs.BOM_UTF8, UTF_8),
+    (_codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (_codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (_codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (_codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+
+# how a xml document which starts with '<?' looks like in encodings which are not ascii compatible (see xml spec, appendix f)
+_XML_STARTS = [
+    (b'\x00\x00\x00<', 'utf-32-be'),
+    (b'<\x00\x00\x00', 'utf-32-le'),
+    (b'\x00<\x00?', 'utf-16-be'),
+    (b'<\x00?\x00', 'utf-16-le'),
+]
+
+_XML_DECLARATION = _re.compile(br'''<\?xml[^>]*?encoding\s*=\s*["']([A-Za-z][A-Za-z0-9._-]*)["']''')
+
+
+def sniff(data: bytes, default: str = None) -> _Tuple[_Union[str, None], int]:
+    """
+    Detects the encoding of raw data by its byte order mark or its xml declaration
+
+    Args:
+        data: The (beginning of the) data. The first 1024 bytes are enough
+        default: Encoding which is returned if no encoding could be detected
+
+    Returns:
+        The encoding (or `default`) and the length of the byte order mark. The data behind the byte order mark can be decoded with the encoding
+
+    Examples:
+        >>> print(sniff(b'\\xef\\xbb\\xbf<?xml version="1.0"?><root/>'))
+        ('utf-8', 3)
+        >>> print(sniff(b'<?xml version="1.0" encoding="ISO-8859-1"?><root/>'))
+        ('iso8859-1', 0)
+
+    """
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            return encoding, len(bom)
+
+    for start, encoding in _XML_STARTS:
+        if data.startswith(start):
+            return encoding, 0
+
+    if data.startswith(b'<?xml'):
+        match = _XML_DECLARATION.match(data, 0, 1024)
+        if match:
+            try:
+                return _codecs.lookup(match.group(1).decode(ASCII)).name, 0
+            except LookupError:
+                pass
+
+    return default, 0
+
+
+@_lru_cache(maxsize=64)
+def is_ascii_compatible(encoding: str) -> bool:
+    """
+    Checks if all ascii characters are encoded as the same bytes in `encoding` (like in utf-8 or latin-1).
+    If so, data in this encoding can be searched, split and compared with ascii bytes without decoding it
+
+    Args:
+        encoding: Name of the encoding
+
+    Returns:
+        If the encoding is ascii compatible
+
+    """
+    ascii_characters = ''.join(chr(char) for char in range(128))
+    try:
+        return ascii_characters.encode(encoding) == ascii_characters.encode(ASCII)
+    except (LookupError, UnicodeError):
+        return False
+
+
+def _can_sniff(data: bytes) -> bool:
+    """Checks if enough of the beginning of the data is known to detect its encoding with `sniff`"""
+    if len(data) < 4:
+        return False
+    # the encoding of a xml declaration is only known when the declaration is complete
+    if b'<?xml'.startswith(data[:5]):
+        return b'>' in data or len(data) >= 1024
+    return True
+
+
+def iter_decode(chunks: _Iterable[bytes], encoding: str = None, errors: str = 'strict') -> _Iterator[str]:
+    """
+    Decodes a stream of byte chunks, characters which are split between two chunks are handled correctly
+
+    Args:
+        chunks: The byte chunks, e.g. read from a binary file
+        encoding: Encoding of the data. If None, it is detected with `sniff` (utf-8 if nothing is detected)
+        errors: How decoding errors are handled, see `bytes.decode`
+
+    Yields:
+        The next decoded chunk
+
+    Notes:
+        If `encoding` is None, the chunks are collected until at least 4 bytes (or a complete xml declaration) are read,
+        so that a byte order mark which is split between chunks is detected too
+
+    Examples:
+        >>> print(list(iter_decode([b'\\xef', b'\\xbb\\xbfhi'])))
+        ['hi']
+
+    """
+    decoder = None
+    buffered = b''
+    for chunk in chunks:
+        if decoder is None:
+            if encoding is None:
+                buffered += chunk
+                if not _can_sniff(buffered):
+                    continue
+                detected, bom_length = sniff(buffered, UTF_8)
+                chunk = buffered[bom_length:]
+            else:
+                detected = encoding
+            decoder = _codecs.getincrementaldecoder(detected)(errors)
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+    if decoder is None:
+        if not buffered:
+            return
+        # the whole data was shorter than needed by `_can_sniff`
+        detected, bom_length = sniff(buffered, UTF_8)
+        decoder = _codecs.getincrementaldecoder(detected)(errors)
+        text = decoder.decode(buffered[bom_length:], True)
+    else:
+        text = decoder.decode(b'', True)
+    if text:
+        yield text
@@ -1,8 +1,11 @@
 #!/usr/bin/python3
 
 import os as _os
+from io import StringIO as _StringIO
 from typing import Iterator as _Iterator, List as _List, Union as _Union
 
+from .encoding import is_ascii_compatible as _is_ascii_compatible, sniff as _sniff
+
 """This file contains utils for file manipulation"""
 
 
@@ -74,11 +77,36 @@ def replace_line(file: str, to_replace: _Union[int, str, _List[int], _List[str]]
         ```
 
     """
-    lines = open(file, 'r').readlines()
+    with open(file, 'rb') as input_file:
+        data = input_file.read()
+
+    encoding, bom_length = _sniff(data)
+    if encoding is None:
+        # the encoding which `open` would use
+        from locale import getpreferredencoding as _getpreferredencoding
+        encoding = _getpreferredencoding(False)
 
     if isinstance(to_replace, str):
         to_replace = [to_replace]
 
+    if not ignore_case and b'\r' not in data and _is_ascii_compatible(encoding):
+        # the lines can be split and compared as bytes, without decoding and encoding the whole file
+        lines = data[bom_length:].splitlines(True)
+        if isinstance(to_replace, list) and to_replace and isinstance(to_replace[0], str):
+            to_replace = [item.encode(encoding) for item in to_replace]
+        _replace_lines(lines, to_replace, new_content.encode(encoding), False)
+        output = data[:bom_length] + b''.join(lines)
+    else:
+        # universal newlines, like `open` in text mode
+        lines = _StringIO(data[bom_length:].decode(encoding), newline=None).readlines()
+        _replace_lines(lines, to_replace, new_content, ignore_case)
+        output = data[:bom_length] + ''.join(lines).encode(encoding)
+
+    with open(file, 'wb') as output_file:
+        output_file.write(output)
+
+
+def _replace_lines(lines: list, to_replace: _Union[int, list], new_content: _Union[str, bytes], ignore_case: bool) -> None:
     if ignore_case:
         for index, item in enumerate(to_replace):
             to_replace[index] = item.lower()
@@ -97,7 +125,3 @@ def replace_line(file: str, to_replace: _Union[int, str, _List[int], _List[str]]
                     item = item.lower()
                 if item in to_replace:
                     lines[index] = new_content
-
-    with open(file, 'w') as file:
-        file.writelines(lines)
-        file.close()
@@ -1,10 +1,5 @@
 #!/usr/bin/python3
 
-import socket as _socket
-
-from json import load as _load
-from urllib.request import urlopen as _urlopen
-
 """This file contains utils for networking stuff"""
 
 
@@ -23,6 +18,8 @@ def online(timeout=5) -> bool:
         True
 
     """
+    import socket as _socket
+
     try:
         host = _socket.gethostbyname('google.com')
 
@@ -58,6 +55,10 @@ def get_ip_infos(ip_address: str = None) -> dict:
          'readme': 'https://ipinfo.io/missingauth'}
 
     """
+    # `json` and `urllib.request` are expensive to import, so they are only loaded when really needed
+    from json import load as _load
+    from urllib.request import urlopen as _urlopen
+
     if ip_address:
         return _load(_urlopen('http://ipinfo.io/' + ip_address + '/json'))
     else:
@@ -1,6 +1,5 @@
 #!/usr/bin/python3
 
-import ctypes as _ctypes
 import os as _os
 from enum import Enum as _Enum
 from sys import platform as _platform
@@ -56,4 +55,5 @@ def is_root() -> bool:
     if platform().LINUX or platform().MAC:
         return _os.geteuid() == 0
     elif platform().WINDOWS:
+        import ctypes as _ctypes  # only needed (and imported) on windows
         return _ctypes.windll.shell32.IsUserAdmin() != 0
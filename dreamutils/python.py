@@ -1,6 +1,5 @@
 #!/usr/bin/python3
 
-import ast as _ast
 from types import FunctionType as _FunctionType, ModuleType as _ModuleType, MethodType as _MethodType
 from typing import Dict as _Dict, List as _List, Union as _Union
 
@@ -49,6 +48,8 @@ def defined_functions_and_classes(file_or_module: _Union[str, _ModuleType], incl
     """
     functions_and_classes = {}
     if isinstance(file_or_module, str):
+        import ast as _ast
+
         with open(file_or_module, "r") as file:
             parsed = _ast.parse(file.read(), filename=file_or_module)
             for x in parsed.body:
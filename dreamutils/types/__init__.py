@@ -0,0 +1,13 @@
+# see `dreamutils.__init__`, the submodules are getting imported lazily
+_submodules = ['dict', 'string', 'xml']
+
+
+def __getattr__(name: str):
+    if name in _submodules:
+        from importlib import import_module as _import_module
+        return _import_module('.' + name, __name__)
+    raise AttributeError('module \'' + __name__ + '\' has no attribute \'' + name + '\'')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_submodules))
@@ -1,5 +1,7 @@
 #!/usr/bin/python3
 
+from typing import Iterable as _Iterable, List as _List, Union as _Union
+
 
 def index(dictionary: dict, index: int):
     """
@@ -12,10 +14,15 @@ def index(dictionary: dict, index: int):
     Returns:
         The indexed value
 
+    Notes:
+        If `dictionary` is a `IndexedDict` the lookup uses its key index instead of copying all keys
+
     Raises:
         IndexError: If the dictionary index is out of range
 
     """
+    if isinstance(dictionary, IndexedDict):
+        return dictionary.key_at(index)
 
     try:
         return list(dictionary)[index]
@@ -34,11 +41,281 @@ def index_by_value(dictionary: dict, value):
     Returns:
         The indexed key
 
+    Notes:
+        If `dictionary` is a `IndexedDict` the lookup uses its reverse index instead of copying all keys and values
+
     Raises:
         IndexError: If the given value is not in the dictionary
 
     """
+    if isinstance(dictionary, IndexedDict):
+        return dictionary.key_of(value)
+
     try:
         return list(dictionary.keys())[list(dictionary.values()).index(value)]
     except ValueError:
         raise IndexError('dict value index out of range')
+
+
+# marks a deleted key in the positional key list of `IndexedDict`
+_REMOVED = object()
+
+
+class IndexedDict(dict):
+    """
+    A dictionary which can be indexed by position and by value without copying it
+
+    The keys are additionally stored in a list, so positional lookups do not have to copy the whole dictionary,
+    and every (hashable) value is mapped back to the keys which hold it. Both indexes are updated on every change:
+    deleted keys are only marked as removed in the key list (a binary indexed tree counts the remaining keys,
+    so positional lookups stay O(log n)) and the list is compacted once more than half of it is removed.
+
+    Notes:
+        Unhashable values (like lists) can be stored too, but looking them up by value is a linear search.
+        If many keys hold the same value, `key_of` has to compare the positions of all of them
+
+    Examples:
+        >>> indexed = IndexedDict(a=1, b=2, c=3)
+        >>> print(indexed.key_at(-1))
+        c
+        >>> print(indexed.key_of(2))
+        b
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._clear_indexes()
+        self.update(*args, **kwargs)
+
+    def _clear_indexes(self) -> None:
+        # keys in insertion order, deleted ones are replaced with `_REMOVED`
+        self._keys = []
+        # key -> position in `_keys`
+        self._positions = {}
+        # binary indexed (fenwick) tree over `_keys`, 1 for every existing key. only used if keys were removed
+        self._tree = []
+        self._removed = 0
+        # value -> keys which hold the value (a dict is used as ordered set)
+        self._reverse = {}
+        self._unhashable = {}
+
+    def _tree_sum(self, end: int) -> int:
+        """Number of existing keys in `_keys[:end]`"""
+        tree = self._tree
+        total = 0
+        while end > 0:
+            total += tree[end - 1]
+            end &= end - 1
+        return total
+
+    def _append_key(self, key) -> None:
+        position = len(self._keys)
+        self._keys.append(key)
+        self._positions[key] = position
+        # the new tree node covers the keys (position + 1 - lowbit, position]
+        node = position + 1
+        self._tree.append(1 + self._tree_sum(position) - self._tree_sum(node - (node & -node)))
+
+    def _remove_key(self, key) -> None:
+        position = self._positions.pop(key)
+        self._keys[position] = _REMOVED
+        self._removed += 1
+
+        tree = self._tree
+        node = position + 1
+        while node <= len(tree):
+            tree[node - 1] -= 1
+            node += node & -node
+
+        if self._removed > len(self._keys) // 2:
+            self._compact()
+
+    def _compact(self) -> None:
+        keys = [key for key in self._keys if key is not _REMOVED]
+        self._keys = []
+        self._positions = {}
+        self._tree = []
+        self._removed = 0
+        for key in keys:
+            self._append_key(key)
+
+    def _add_value(self, key, value) -> None:
+        try:
+            self._reverse.setdefault(value, {})[key] = None
+        except TypeError:
+            self._unhashable[key] = None
+
+    def _remove_value(self, key, value) -> None:
+        try:
+            keys = self._reverse[value]
+        except TypeError:
+            del self._unhashable[key]
+            return
+        del keys[key]
+        if not keys:
+            del self._reverse[value]
+
+    def __setitem__(self, key, value) -> None:
+        if key in self:
+            self._remove_value(key, self[key])
+        else:
+            self._append_key(key)
+        self._add_value(key, value)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key) -> None:
+        value = self[key]
+        super().__delitem__(key)
+        self._remove_value(key, value)
+        self._remove_key(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return super().pop(key, *default)
+
+    def popitem(self) -> tuple:
+        if not self:
+            raise KeyError('popitem(): dictionary is empty')
+        key = self.key_at(-1)
+        value = self[key]
+        del self[key]
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other) -> 'IndexedDict':
+        self.update(other)
+        return self
+
+    def __or__(self, other) -> 'IndexedDict':
+        if not isinstance(other, dict):
+            return NotImplemented
+        merged = self.copy()
+        merged.update(other)
+        return merged
+
+    def __ror__(self, other) -> 'IndexedDict':
+        if not isinstance(other, dict):
+            return NotImplemented
+        merged = IndexedDict(other)
+        merged.update(self)
+        return merged
+
+    def clear(self) -> None:
+        super().clear()
+        self._clear_indexes()
+
+    def copy(self) -> 'IndexedDict':
+        return IndexedDict(self)
+
+    def __reduce__(self) -> tuple:
+        # the default dict pickling would call `__setitem__` before the indexes exist
+        return self.__class__, (dict(self),)
+
+    def _position_of(self, index: int) -> int:
+        """Position in `_keys` of the `index`th existing key"""
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('dict index out of range')
+        if not self._removed:
+            return index
+
+        # descends the tree to the position with `index + 1` existing keys before (and including) it
+        tree = self._tree
+        position = 0
+        remaining = index + 1
+        step = 1 << (len(tree).bit_length() - 1)
+        while step:
+            node = position + step
+            if node <= len(tree) and tree[node - 1] < remaining:
+                position = node
+                remaining -= tree[node - 1]
+            step >>= 1
+        return position
+
+    def key_at(self, index: _Union[int, slice]):
+        """
+        Returns the key at the given position
+
+        Args:
+            index: Position of the key (or a slice of positions)
+
+        Returns:
+            The key
+
+        Raises:
+            IndexError: If the dictionary index is out of range
+
+        """
+        if isinstance(index, slice):
+            if self._removed:
+                self._compact()
+            return self._keys[index]
+        return self._keys[self._position_of(index)]
+
+    def keys_at(self, indexes: _Iterable[int]) -> _List:
+        """
+        Returns the keys at all given positions at once
+
+        Args:
+            indexes: Positions of the keys
+
+        Returns:
+            The keys in the order of `indexes`
+
+        Raises:
+            IndexError: If one dictionary index is out of range
+
+        """
+        if self._removed:
+            self._compact()
+        keys = self._keys
+        try:
+            return [keys[index] for index in indexes]
+        except IndexError:
+            raise IndexError('dict index out of range')
+
+    def key_of(self, value):
+        """
+        Returns the first key which holds the given value
+
+        Args:
+            value: Value to search
+
+        Returns:
+            The key
+
+        Raises:
+            IndexError: If the given value is not in the dictionary
+
+        """
+        positions = self._positions
+        try:
+            keys = self._reverse.get(value)
+        except TypeError:
+            # unhashable value, only the unhashable stored values can be equal to it
+            keys = None
+        if keys:
+            first = next(iter(keys)) if len(keys) == 1 else min(keys, key=positions.__getitem__)
+        else:
+            first = _REMOVED
+
+        for key in self._unhashable:
+            if self[key] == value and (first is _REMOVED or positions[key] < positions[first]):
+                first = key
+
+        if first is _REMOVED:
+            raise IndexError('dict value index out of range')
+        return first
@@ -1,17 +1,215 @@
 #!/usr/bin/python3
 
 import re as _re
-from typing import Union as _Union
+from collections import deque as _deque
+from functools import lru_cache as _lru_cache, partial as _partial
+from itertools import islice as _islice
+from typing import AnyStr as _AnyStr, Callable as _Callable, IO as _IO, Iterable as _Iterable, Iterator as _Iterator, List as _List, Pattern as _Pattern, \
+    Sequence as _Sequence, Tuple as _Tuple, Union as _Union
+
+from ..encoding import ASCII as _ASCII, UTF_8 as _UTF_8
 
 """This file contains utils for string manipulation"""
 
 
-def remove_brackets(string: str) -> str:
+class BracketRemover:
+    r"""
+    Removes brackets and the content between them in a single pass
+
+    Instead of looking at every single character, the remover jumps from bracket to bracket (with a compiled regex),
+    so text outside of brackets is copied in whole slices. Every bracket pair has its own nesting counter,
+    a closing bracket without a matching opening one is kept as normal text.
+    Works on `str` as well as on `bytes` (the brackets are encoded as utf-8 then).
+
+    Examples:
+        >>> remover = BracketRemover([('{', '}'), ('<', '>')], escape='\\')
+        >>> print(remover.remove('Keep \\{this}{ but not <this>}!'))
+        Keep {this}!
+
+    """
+
+    def __init__(self, pairs: _Sequence[_Tuple[str, str]] = (('[', ']'), ('(', ')')), escape: str = None):
+        """
+        Args:
+            pairs: Opening and closing bracket pairs. A bracket may be longer than one character
+            escape: If given, the character following this one is always handled as normal text (the escape itself is removed)
+        """
+        if not pairs:
+            raise ValueError('At least one bracket pair must be given')
+        for open_bracket, close_bracket in pairs:
+            if not open_bracket or not close_bracket:
+                raise ValueError('Brackets must not be empty')
+
+        self.pairs = [(open_bracket, close_bracket) for open_bracket, close_bracket in pairs]
+        self.escape = escape
+        self._compiled = {}
+
+    def _compile(self, data_type: type, separator: str = None) -> tuple:
+        try:
+            return self._compiled[data_type, separator]
+        except KeyError:
+            pass
+
+        if data_type is bytes:
+            pairs = [(open_bracket.encode(_UTF_8), close_bracket.encode(_UTF_8)) for open_bracket, close_bracket in self.pairs]
+            escape = self.escape.encode(_UTF_8) if self.escape else None
+            join = b'|'.join
+            any_char = b'.'
+        else:
+            pairs = self.pairs
+            escape = self.escape
+            join = '|'.join
+            any_char = '.'
+
+        # every token is mapped to the index of the pair it opens and the index of the pair it closes (or None)
+        tokens = {}
+        for pair_index, (open_bracket, close_bracket) in enumerate(pairs):
+            opens, closes = tokens.get(open_bracket, (None, None))
+            tokens[open_bracket] = (pair_index if opens is None else opens, closes)
+            opens, closes = tokens.get(close_bracket, (None, None))
+            tokens[close_bracket] = (opens, pair_index if closes is None else closes)
+        if separator:
+            # a separator ends all open brackets, this is used to process multiple joined strings at once
+            tokens[separator] = (None, None)
+
+        # longer tokens first, so that e.g. '[[' is preferred over '['
+        patterns = [_re.escape(token) for token in sorted(tokens, key=len, reverse=True)]
+        # the longest text a token can span. used to keep back incomplete tokens while streaming
+        lookahead = max(len(token) for token in tokens)
+        if escape:
+            # the escape and the escaped character are matched together, so an escaped bracket is never seen as bracket
+            if separator:
+                patterns.insert(0, _re.escape(escape) + '(?!' + _re.escape(separator) + ')' + any_char)
+            else:
+                patterns.insert(0, _re.escape(escape) + any_char)
+            lookahead = max(lookahead, len(escape) + 1)
+
+        # a pair which contains no other token can be removed directly with a regex, without changing any nesting state.
+        # only possible if every token is a single, unique character and no escape is used
+        innermost = None
+        if not escape and all(len(token) == 1 for token in tokens) and len(tokens) == len(pairs) * 2 + (1 if separator else 0):
+            # the single character tokens are always ascii here, so the pattern can be built as str and encoded if needed
+            excluded = _re.escape(''.join(token if data_type is str else token.decode(_ASCII) for token in tokens))
+            innermost = '|'.join(_re.escape(open_bracket) + '[^' + excluded + ']*' + _re.escape(close_bracket) for open_bracket, close_bracket in self.pairs)
+            innermost = _re.compile(innermost if data_type is str else innermost.encode(_ASCII))
+
+        self._compiled[data_type, separator] = compiled = (_re.compile(join(patterns), _re.DOTALL), innermost, tokens, escape, lookahead)
+        return compiled
+
+    def _process(self, data: _AnyStr, depths: _List[int], final: bool, separator: str = None) -> _Tuple[_List[_AnyStr], _AnyStr]:
+        pattern, innermost, tokens, escape, lookahead = self._compile(type(data), separator)
+        if innermost:
+            # removes the most brackets (all which are not nested) in c speed. only the rest is handled below
+            data = innermost.sub(data[:0], data)
+        escape_length = len(escape) if escape else 0
+
+        # matches starting at or behind `limit` could be cut off by the chunk end and are processed with the next chunk
+        limit = len(data) if final else len(data) - lookahead + 1
+        nested = sum(depths)
+        output = []
+        # start of the current text outside of any brackets
+        pos = 0
+        last_end = 0
+
+        for match in pattern.finditer(data):
+            start = match.start()
+            if start >= limit:
+                break
+            token = match.group()
+            last_end = match.end()
+
+            try:
+                opens, closes = tokens[token]
+            except KeyError:
+                # escape sequence
+                if not nested:
+                    output.append(data[pos:start])
+                    output.append(token[escape_length:])
+                    pos = last_end
+                continue
+
+            if closes is not None and depths[closes] > 0:
+                depths[closes] -= 1
+                nested -= 1
+                if not nested:
+                    pos = last_end
+            elif opens is not None:
+                if not nested:
+                    output.append(data[pos:start])
+                depths[opens] += 1
+                nested += 1
+            elif closes is None:
+                # separator
+                if nested:
+                    depths[:] = [0] * len(depths)
+                    nested = 0
+                    pos = start
+            # else: closing bracket without an opening one, it stays in (or is removed with) the surrounding text
+
+        end = max(limit, last_end)
+        if not nested:
+            output.append(data[pos:end])
+        # the unprocessed rest
+        return output, data[end:]
+
+    def remove(self, string: _AnyStr) -> _AnyStr:
+        """
+        Removes the brackets and the content between them from `string`
+
+        Args:
+            string: `str` or `bytes` from which the brackets should be removed
+
+        Returns:
+            `string` without brackets and the content between them
+
+        """
+        output, _ = self._process(string, [0] * len(self.pairs), True)
+        return string[:0].join(output)
+
+    def stream(self, file: _IO, chunk_size: int = 1024 * 1024) -> _Iterator[_AnyStr]:
+        """
+        Removes the brackets and the content between them from a (text or binary) file-like object chunk by chunk
+
+        Args:
+            file: File-like object to read from
+            chunk_size: Size of every read chunk
+
+        Yields:
+            The next processed chunk. Joined together they are the whole file without brackets
+
+        """
+        depths = [0] * len(self.pairs)
+        rest = None
+
+        while True:
+            chunk = file.read(chunk_size)
+            final = not chunk
+            if rest:
+                chunk = rest + chunk if chunk else rest
+            if not chunk:
+                return
+
+            output, rest = self._process(chunk, depths, final)
+            processed = chunk[:0].join(output)
+            if processed:
+                yield processed
+            if final:
+                return
+
+
+@_lru_cache(maxsize=32)
+def _bracket_remover(pairs: _Tuple[_Tuple[str, str], ...], escape: _Union[str, None]) -> BracketRemover:
+    return BracketRemover(pairs, escape)
+
+
+def remove_brackets(string: _AnyStr, pairs: _Sequence[_Tuple[str, str]] = (('[', ']'), ('(', ')')), escape: str = None) -> _AnyStr:
     """
     Removes brackets and the content between it from a string
 
     Args:
-        string: string from which the brackets should be removed
+        string: string (or bytes) from which the brackets should be removed
+        pairs: Opening and closing bracket pairs which should be removed
+        escape: If given, the character following this one is always handled as normal text
 
     Returns:
         `string` without brackets and the content between it
@@ -21,22 +219,41 @@ def remove_brackets(string: str) -> str:
         This is an example string
 
     """
-    finished_string = ''
-    square_brackets = 0
-    parentheses = 0
-    for brackets in string:
-        if brackets == '[':
-            square_brackets += 1
-        elif brackets == '(':
-            parentheses += 1
-        elif brackets == ']' and square_brackets > 0:
-            square_brackets -= 1
-        elif brackets == ')' and parentheses > 0:
-            parentheses -= 1
-        elif square_brackets == 0 and parentheses == 0:
-            finished_string += brackets
-
-    return finished_string
+    return _bracket_remover(tuple(tuple(pair) for pair in pairs), escape).remove(string)
+
+
+def remove_brackets_stream(file: _IO, pairs: _Sequence[_Tuple[str, str]] = (('[', ']'), ('(', ')')), escape: str = None,
+                           chunk_size: int = 1024 * 1024) -> _Iterator[_AnyStr]:
+    """
+    Removes brackets and the content between it from a (text or binary) file-like object, without reading it at once
+
+    Args:
+        file: File-like object to read from
+        pairs: Opening and closing bracket pairs which should be removed
+        escape: If given, the character following this one is always handled as normal text
+        chunk_size: Size of every read chunk
+
+    Yields:
+        The next processed chunk
+
+    Examples:
+        >>> with open('subtitles.srt') as source, open('subtitles_clean.srt', 'w') as target:
+        ...     target.writelines(remove_brackets_stream(source))
+
+    """
+    return _bracket_remover(tuple(tuple(pair) for pair in pairs), escape).stream(file, chunk_size)
+
+
+@_lru_cache(maxsize=32)
+def _space_pattern(space: _Union[str, int], replace_with_single_space: bool) -> _Tuple[_Pattern, str]:
+    if isinstance(space, int):
+        space = ' ' * space
+
+    space_to_replace = ''
+    if replace_with_single_space:
+        space_to_replace = ' '
+
+    return _re.compile(space + '+'), space_to_replace
 
 
 def remove_space(string: str, space: _Union[str, int] = '  ', replace_with_single_space=True) -> str:
@@ -56,11 +273,174 @@ def remove_space(string: str, space: _Union[str, int] = '  ', replace_with_singl
         This string has way to much space
 
     """
-    if isinstance(space, int):
-        space = ' ' * space
+    pattern, space_to_replace = _space_pattern(space, replace_with_single_space)
+    return pattern.sub(space_to_replace, string)
 
-    space_to_replace = ''
-    if replace_with_single_space:
-        space_to_replace = ' '
 
-    return _re.sub(space + '+', space_to_replace, string)
+# joins the strings of a batch, so that one regex / bracket pass can process the whole batch at once
+_SEPARATOR = '\n'
+
+
+class Normalizer:
+    """
+    Applies multiple normalization steps to many strings
+
+    Every step is compiled once when the normalizer is created.
+    `remove_brackets`, `remove_space` (also wrapped in `functools.partial` with keyword arguments) and `BracketRemover` steps
+    are not applied string by string, but once on a whole batch of joined strings.
+    Every other callable which takes and returns a string can be used as step too, it gets called for every single string.
+
+    Examples:
+        >>> from functools import partial
+        >>> normalizer = Normalizer([remove_brackets, partial(remove_space, space=2), str.strip])
+        >>> print(normalizer.normalize_batch(['A  title [2019]', 'Another (sub)   title']))
+        ['A title', 'Another title']
+
+    """
+
+    def __init__(self, steps: _Sequence[_Callable[[str], str]] = (remove_brackets, remove_space)):
+        """
+        Args:
+            steps: Normalization steps which are applied in the given order
+        """
+        self.steps = [self._compile_step(step) for step in steps]
+
+    @staticmethod
+    def _compile_step(step: _Callable[[str], str]) -> tuple:
+        function, keywords = step, {}
+        if isinstance(step, _partial) and not step.args:
+            function, keywords = step.func, step.keywords or {}
+
+        if isinstance(step, BracketRemover) or function is remove_brackets:
+            if function is remove_brackets:
+                step = _bracket_remover(tuple(tuple(pair) for pair in keywords.get('pairs', (('[', ']'), ('(', ')')))), keywords.get('escape'))
+            joinable = all(_SEPARATOR not in token for pair in step.pairs for token in pair) and _SEPARATOR not in (step.escape or '')
+            return 'brackets', step, joinable
+        elif function is remove_space:
+            pattern, space_to_replace = _space_pattern(keywords.get('space', '  '), keywords.get('replace_with_single_space', True))
+            # the pattern must not be able to match (or remove) the separator
+            joinable = not pattern.pattern.strip(' \t+')
+            return 'space', (pattern, space_to_replace), joinable
+        else:
+            return 'call', step, False
+
+    def normalize(self, string: str) -> str:
+        """
+        Normalizes a single string
+
+        Args:
+            string: String to normalize
+
+        Returns:
+            The normalized string
+
+        """
+        for kind, step, _ in self.steps:
+            if kind == 'brackets':
+                string = step.remove(string)
+            elif kind == 'space':
+                string = step[0].sub(step[1], string)
+            else:
+                string = step(string)
+        return string
+
+    def normalize_batch(self, strings: _Sequence[str]) -> _List[str]:
+        """
+        Normalizes a batch of strings
+
+        Args:
+            strings: Strings to normalize
+
+        Returns:
+            The normalized strings in the same order
+
+        """
+        items = list(strings)
+        joined = None
+
+        for kind, step, joinable in self.steps:
+            if joinable and joined is None:
+                joined = _SEPARATOR.join(items)
+                if joined.count(_SEPARATOR) != len(items) - 1:
+                    # a string contains the separator itself
+                    joinable = False
+                    joined = None
+            elif not joinable and joined is not None:
+                items = joined.split(_SEPARATOR)
+                joined = None
+
+            if joinable:
+                if kind == 'brackets':
+                    joined = ''.join(step._process(joined, [0] * len(step.pairs), True, _SEPARATOR)[0])
+                else:
+                    joined = step[0].sub(step[1], joined)
+            elif kind == 'brackets':
+                items = [step.remove(item) for item in items]
+            elif kind == 'space':
+                sub, space_to_replace = step[0].sub, step[1]
+                items = [sub(space_to_replace, item) for item in items]
+            else:
+                items = [step(item) for item in items]
+
+        if joined is not None:
+            items = joined.split(_SEPARATOR) if items else []
+        return items
+
+    def normalize_many(self, strings: _Iterable[str], processes: int = None, chunk_size: int = 10000) -> _Iterator[_List[str]]:
+        """
+        Normalizes an iterable of strings in chunks, optionally spread over multiple processes
+
+        Notes:
+            To use multiple processes, all custom steps must be picklable (e.g. functions defined on module level)
+
+        Args:
+            strings: Strings to normalize. They are only read chunk by chunk
+            processes: Number of worker processes. If None or 1, the current process is used
+            chunk_size: Number of strings per chunk
+
+        Yields:
+            The normalized strings of the next chunk, in the same order as given
+
+        """
+        strings = iter(strings)
+        chunks = iter(lambda: list(_islice(strings, chunk_size)), [])
+
+        if not processes or processes <= 1:
+            for chunk in chunks:
+                yield self.normalize_batch(chunk)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+
+        with _ProcessPoolExecutor(processes) as executor:
+            # only a limited amount of chunks is submitted at once, so the input is not read completely into memory
+            pending = _deque()
+            for chunk in chunks:
+                pending.append(executor.submit(self.normalize_batch, chunk))
+                if len(pending) >= processes * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+def normalize(strings: _Iterable[str], steps: _Sequence[_Callable[[str], str]] = (remove_brackets, remove_space), processes: int = None,
+              chunk_size: int = 10000) -> _Iterator[str]:
+    """
+    Normalizes many strings with the given steps
+
+    Args:
+        strings: Strings to normalize
+        steps: Normalization steps which are applied in the given order. See `Normalizer`
+        processes: Number of worker processes. If None or 1, the current process is used
+        chunk_size: Number of strings which are processed at once
+
+    Yields:
+        The next normalized string
+
+    Examples:
+        >>> print(list(normalize(['This  is [not]  a title', 'Title (2020)'], [remove_brackets, remove_space, str.strip])))
+        ['This is a title', 'Title']
+
+    """
+    for chunk in Normalizer(steps).normalize_many(strings, processes, chunk_size):
+        yield from chunk
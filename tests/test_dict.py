@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+
+import pickle
+import random
+import unittest
+
+from dreamutils.types.dict import IndexedDict, index, index_by_value
+
+"""Compares `IndexedDict` and its lookups with a plain dict"""
+
+
+class IndexedDictTest(unittest.TestCase):
+
+    def assertSameAsDict(self, indexed: IndexedDict, plain: dict):
+        self.assertEqual(plain, dict(indexed))
+        self.assertEqual(list(plain), list(indexed))
+        keys = list(plain)
+        self.assertEqual(keys, [indexed.key_at(i) for i in range(len(keys))])
+        self.assertEqual(keys[::-1], [indexed.key_at(-i) for i in range(1, len(keys) + 1)])
+        self.assertEqual(keys, indexed.keys_at(range(len(keys))))
+        self.assertEqual(keys[1::2], indexed.key_at(slice(1, None, 2)))
+        values = list(plain.values())
+        for value in values:
+            self.assertEqual(keys[values.index(value)], indexed.key_of(value))
+
+    def test_random_operations(self):
+        for seed in range(20):
+            rand = random.Random(seed)
+            indexed = IndexedDict()
+            plain = {}
+            for _ in range(300):
+                operation = rand.random()
+                key = rand.randrange(40)
+                value = rand.choice([rand.randrange(8), [rand.randrange(3)]])
+                if operation < 0.45:
+                    indexed[key] = value
+                    plain[key] = value
+                elif operation < 0.65:
+                    if key in plain:
+                        del indexed[key]
+                        del plain[key]
+                    else:
+                        self.assertRaises(KeyError, indexed.__delitem__, key)
+                elif operation < 0.75:
+                    self.assertEqual(plain.pop(key, None), indexed.pop(key, None))
+                elif operation < 0.8:
+                    if plain:
+                        self.assertEqual(plain.popitem(), indexed.popitem())
+                elif operation < 0.85:
+                    self.assertEqual(plain.setdefault(key, value), indexed.setdefault(key, value))
+                elif operation < 0.95:
+                    other = {rand.randrange(40): rand.randrange(8) for _ in range(3)}
+                    indexed.update(other)
+                    plain.update(other)
+                else:
+                    other = {rand.randrange(40): rand.randrange(8)}
+                    indexed |= other
+                    plain.update(other)
+                self.assertSameAsDict(indexed, plain)
+
+    def test_out_of_range(self):
+        indexed = IndexedDict(a=1, b=2)
+        del indexed['a']
+        self.assertRaises(IndexError, indexed.key_at, 1)
+        self.assertRaises(IndexError, indexed.key_at, -2)
+        self.assertRaises(IndexError, indexed.key_of, 1)
+        self.assertRaises(IndexError, indexed.keys_at, [0, 1])
+
+    def test_copy_and_pickle(self):
+        indexed = IndexedDict(a=1, b=[2], c=1)
+        del indexed['a']
+        for copied in [indexed.copy(), pickle.loads(pickle.dumps(indexed)), indexed | {}, {} | indexed]:
+            self.assertIsInstance(copied, IndexedDict)
+            self.assertSameAsDict(copied, {'b': [2], 'c': 1})
+
+    def test_module_functions(self):
+        plain = {'a': 1, 'b': 2, 'c': 1}
+        indexed = IndexedDict(plain)
+        for dictionary in [plain, indexed]:
+            self.assertEqual('c', index(dictionary, -1))
+            self.assertEqual('a', index_by_value(dictionary, 1))
+            self.assertRaises(IndexError, index, dictionary, 3)
+            self.assertRaises(IndexError, index_by_value, dictionary, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
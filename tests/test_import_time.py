@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+
+import os
+import subprocess
+import sys
+import unittest
+
+"""Guards against heavy dependencies being imported at import time again"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# dependencies which are only imported when a function really needs them
+DEFERRED = ['ctypes', 'urllib.request', 'json', 'ssl', 'hashlib']
+
+
+def imported_modules(module: str) -> dict:
+    """Imports `module` in a new interpreter and returns the cumulative import time (in us) of every loaded module"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module], cwd=ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+class ImportTimeTest(unittest.TestCase):
+
+    def test_deferred_dependencies(self):
+        for module in ['dreamutils', 'dreamutils.os', 'dreamutils.net', 'dreamutils.types.xml']:
+            with self.subTest(module=module):
+                loaded = imported_modules(module)
+                self.assertFalse([name for name in DEFERRED if name in loaded], module + ' imports deferred dependencies')
+
+    def test_package_imports_no_submodules(self):
+        self.assertEqual(['dreamutils'], [name for name in imported_modules('dreamutils') if name.startswith('dreamutils')])
+
+
+if __name__ == '__main__':
+    # prints the cumulative import times, to compare them between changes
+    for name in ['dreamutils', 'dreamutils.os', 'dreamutils.net', 'dreamutils.types.xml']:
+        print(name, str(imported_modules(name)[name] / 1000) + ' ms')
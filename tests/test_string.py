@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+
+import io
+import random
+import re
+import unittest
+from functools import partial
+
+from dreamutils.types.string import BracketRemover, Normalizer, normalize, remove_brackets, remove_brackets_stream, remove_space
+
+"""Compares the string utils with simple per-character implementations"""
+
+
+def baseline_remove_brackets(string: str) -> str:
+    """The original per-character implementation of `remove_brackets`"""
+    finished_string = ''
+    square_brackets = 0
+    parentheses = 0
+    for brackets in string:
+        if brackets == '[':
+            square_brackets += 1
+        elif brackets == '(':
+            parentheses += 1
+        elif brackets == ']' and square_brackets > 0:
+            square_brackets -= 1
+        elif brackets == ')' and parentheses > 0:
+            parentheses -= 1
+        elif square_brackets == 0 and parentheses == 0:
+            finished_string += brackets
+
+    return finished_string
+
+
+def reference_remove_brackets(string: str, pairs, escape: str = None) -> str:
+    """Per-position implementation of `BracketRemover` for brackets which never start with the same character"""
+    depths = [0] * len(pairs)
+    output = []
+    pos = 0
+    while pos < len(string):
+        if escape and string.startswith(escape, pos) and pos + len(escape) < len(string):
+            if not any(depths):
+                output.append(string[pos + len(escape)])
+            pos += len(escape) + 1
+            continue
+
+        for index, (open_bracket, close_bracket) in enumerate(pairs):
+            if string.startswith(close_bracket, pos) and depths[index] > 0:
+                depths[index] -= 1
+                pos += len(close_bracket)
+                break
+            if string.startswith(open_bracket, pos):
+                depths[index] += 1
+                pos += len(open_bracket)
+                break
+        else:
+            if not any(depths):
+                output.append(string[pos])
+            pos += 1
+    return ''.join(output)
+
+
+def random_strings(alphabet: str, count: int = 300, max_length: int = 40, seed: int = 0):
+    rand = random.Random(seed)
+    for _ in range(count):
+        yield ''.join(rand.choice(alphabet) for _ in range(rand.randrange(max_length)))
+
+
+class RemoveBracketsTest(unittest.TestCase):
+
+    def test_default_pairs(self):
+        for string in random_strings('ab [](),'):
+            expected = baseline_remove_brackets(string)
+            self.assertEqual(expected, remove_brackets(string))
+            self.assertEqual(expected.encode(), remove_brackets(string.encode()))
+
+    def test_stream_chunk_boundaries(self):
+        for string in random_strings('ab [](),', 100):
+            expected = baseline_remove_brackets(string)
+            for chunk_size in range(1, 8):
+                with self.subTest(string=string, chunk_size=chunk_size):
+                    self.assertEqual(expected, ''.join(remove_brackets_stream(io.StringIO(string), chunk_size=chunk_size)))
+                    self.assertEqual(expected.encode(), b''.join(remove_brackets_stream(io.BytesIO(string.encode()), chunk_size=chunk_size)))
+
+    def test_long_brackets_and_escape(self):
+        pairs = [('{{', '}}'), ('<!--', '-->'), ('(', ')')]
+        remover = BracketRemover(pairs, escape='\\')
+        for string in random_strings('a {}<!->()\\', 200, 60):
+            expected = reference_remove_brackets(string, pairs, '\\')
+            self.assertEqual(expected, remover.remove(string))
+            for chunk_size in range(1, 8):
+                with self.subTest(string=string, chunk_size=chunk_size):
+                    self.assertEqual(expected, ''.join(remover.stream(io.StringIO(string), chunk_size)))
+
+    def test_invalid_pairs(self):
+        self.assertRaises(ValueError, BracketRemover, [])
+        self.assertRaises(ValueError, BracketRemover, [('', ')')])
+
+
+def reference_remove_space(string: str, space='  ', replace_with_single_space=True) -> str:
+    """The original implementation of `remove_space`"""
+    if isinstance(space, int):
+        space = ' ' * space
+    return re.sub(space + '+', ' ' if replace_with_single_space else '', string)
+
+
+class NormalizerTest(unittest.TestCase):
+
+    # steps and the same steps applied string by string without batching
+    STEPS = [
+        ([remove_brackets, remove_space], [baseline_remove_brackets, reference_remove_space]),
+        ([partial(remove_space, space=1), remove_brackets, str.strip],
+         [partial(reference_remove_space, space=1), baseline_remove_brackets, str.strip]),
+        ([partial(remove_brackets, pairs=[('{{', '}}')], escape='\\'), partial(remove_space, space='\\s', replace_with_single_space=False)],
+         [partial(reference_remove_brackets, pairs=[('{{', '}}')], escape='\\'), partial(reference_remove_space, space='\\s', replace_with_single_space=False)]),
+        ([BracketRemover([('[', ']'), ('\n', '|')]), str.upper, remove_space],
+         [partial(reference_remove_brackets, pairs=[('[', ']'), ('\n', '|')]), str.upper, reference_remove_space]),
+    ]
+
+    def expected(self, reference_steps, strings):
+        results = []
+        for string in strings:
+            for step in reference_steps:
+                string = step(string)
+            results.append(string)
+        return results
+
+    def test_batch_matches_single_strings(self):
+        rand = random.Random(0)
+        for steps, reference_steps in self.STEPS:
+            normalizer = Normalizer(steps)
+            for _ in range(100):
+                # unbalanced brackets must not reach into the next string of the batch
+                strings = list(random_strings('ab  [](){}|\\', rand.randrange(6), 12, rand.randrange(1 << 30)))
+                if rand.random() < 0.2:
+                    strings.append('line\nbreak [x')
+                expected = self.expected(reference_steps, strings)
+                with self.subTest(steps=steps, strings=strings):
+                    self.assertEqual(expected, normalizer.normalize_batch(strings))
+                    self.assertEqual(expected, [normalizer.normalize(string) for string in strings])
+
+    def test_normalize_chunks(self):
+        strings = list(random_strings('ab  []()', 50, 20))
+        expected = self.expected([baseline_remove_brackets, reference_remove_space], strings)
+        for chunk_size in [1, 3, 50]:
+            self.assertEqual(expected, list(normalize(strings, chunk_size=chunk_size)))
+        self.assertEqual(expected, list(normalize(iter(strings), processes=2, chunk_size=7)))
+        self.assertEqual([], Normalizer().normalize_batch([]))
+        self.assertEqual([''], Normalizer().normalize_batch(['']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,226 @@
+#!/usr/bin/python3
+
+import copy
+import random
+import unittest
+import xml.etree.ElementTree as ET
+
+from dreamutils.types.xml import XMLManipulator, XMLQuery, compile_query, new_xml
+
+"""Checks the lookup tables of `XMLManipulator` against the tree they describe"""
+
+TAGS = ['a', 'b', 'c']
+
+
+def random_changes(manipulator: XMLManipulator, rand: random.Random, count: int) -> None:
+    """Applies random adds, updates and (nested) removals"""
+    for _ in range(count):
+        ids = list(manipulator.elements)
+        operation = rand.random()
+        if operation < 0.6:
+            manipulator.add(rand.choice(ids), rand.choice(TAGS), 'text', x=str(rand.randrange(2)))
+        elif operation < 0.8:
+            manipulator.update(rand.choice(ids), rand.choice(TAGS), 'new', x=str(rand.randrange(2)))
+        elif len(ids) > 1:
+            manipulator.remove(rand.choice(ids[1:]))
+
+
+class XMLManipulatorTest(unittest.TestCase):
+
+    def assertTablesMatchTree(self, manipulator: XMLManipulator):
+        parents = {manipulator.root: None}
+        for element in manipulator.root.iter():
+            for sub_element in element:
+                parents[sub_element] = element
+
+        self.assertEqual(set(parents), set(manipulator.elements.values()))
+        self.assertEqual(len(parents), len(manipulator.elements))
+        tag_index = {}
+        for id, element in manipulator.elements.items():
+            self.assertLess(id, manipulator._next_id)
+            self.assertEqual(id, manipulator.get_id_of(element))
+            parent_id = manipulator.get_parent_id(id)
+            self.assertIs(parents[element], None if parent_id is None else manipulator.elements[parent_id])
+            tag_index.setdefault(element.tag, set()).add(id)
+        self.assertEqual(tag_index, {tag: set(ids) for tag, ids in manipulator._tag_index.items()})
+
+    def test_random_changes(self):
+        for seed in range(10):
+            manipulator = XMLManipulator(ET.fromstring('<r><a x="0"><b/></a><c><a/></c></r>'))
+            self.assertEqual(list(range(5)), list(manipulator.elements))
+            random_changes(manipulator, random.Random(seed), 200)
+            self.assertTablesMatchTree(manipulator)
+
+    def test_sequential_ids(self):
+        manipulator = new_xml()
+        first = manipulator.add(0, 'a')
+        second = manipulator.add(first, 'b')
+        manipulator.remove(first)
+        self.assertEqual([first + 1, second + 1], [second, manipulator.add(0, 'c')])
+        self.assertRaises(KeyError, manipulator.get_element, second)
+
+    def test_nested_remove(self):
+        manipulator = XMLManipulator(ET.fromstring('<r><a><b><c/></b><c/></a><c/></r>'))
+        manipulator.remove(1)
+        self.assertEqual([0, 5], list(manipulator.elements))
+        self.assertEqual({'r': {0: None}, 'c': {5: None}}, manipulator._tag_index)
+        self.assertEqual(5, manipulator.get_id('c'))
+        self.assertTablesMatchTree(manipulator)
+
+    def test_remove_errors(self):
+        manipulator = new_xml()
+        self.assertRaises(ValueError, manipulator.remove, 0)
+        self.assertRaises(IndexError, manipulator.remove, 1)
+        self.assertRaises(IndexError, manipulator.add, 1, 'a')
+
+    def test_get_id(self):
+        manipulator = XMLManipulator(ET.fromstring('<r><b x="1" y="2"/><p k="v"><b x="1"/></p></r>'))
+        self.assertEqual(1, manipulator.get_id('b'))
+        self.assertEqual(3, manipulator.get_id('b', {'x': '1'}))
+        self.assertEqual(3, manipulator.get_id('b', parent_tag='p'))
+        self.assertEqual(3, manipulator.get_id('b', parent_attrib={'k': 'v'}))
+        self.assertRaises(ValueError, manipulator.get_id, 'b', {'y': '2'})
+        manipulator.update(3, 'z')
+        self.assertEqual(3, manipulator.get_id('z'))
+        self.assertRaises(ValueError, manipulator.get_id, 'b', parent_tag='p')
+
+
+def reference_query(root: ET.Element, path: str) -> list:
+    """Finds the elements of a `XMLQuery` path with `ElementTree.findall`, without duplicates and in document order"""
+    document = ET.Element('document')
+    document.append(root)
+    try:
+        found = document.findall('.' + path if path.startswith('/') and not path.startswith('//') else './/' + path.lstrip('/'))
+    finally:
+        document.remove(root)
+    positions = {element: position for position, element in enumerate(root.iter())}
+    return sorted(set(found), key=positions.__getitem__)
+
+
+class XMLQueryTest(unittest.TestCase):
+
+    PATHS = ['a', 'b[@x]', 'a/b', 'a//b', '//c[@x="1"]', '/r/a', '/r//b[@x="0"]', '*[@x="1"]', 'a/*', 'c//*/b', '/r']
+
+    def test_random_trees(self):
+        for seed in range(10):
+            manipulator = XMLManipulator(ET.fromstring('<r><a x="0"><b/></a><c><a/></c></r>'))
+            random_changes(manipulator, random.Random(seed), 100)
+            for path in self.PATHS:
+                with self.subTest(seed=seed, path=path):
+                    expected = reference_query(manipulator.root, path)
+                    found = list(XMLQuery(path).iter(manipulator.root))
+                    self.assertEqual(expected, found)
+                    ids = list(manipulator.query(path))
+                    self.assertEqual(sorted(ids), ids)
+                    self.assertEqual(sorted(manipulator.get_id_of(element) for element in expected), ids)
+                    self.assertEqual(ids[:1], list(manipulator.query(compile_query(path), 1)))
+
+    def test_order(self):
+        manipulator = XMLManipulator(ET.fromstring('<r><a/><c><b n="late"/></c></r>'))
+        manipulator.add(1, 'b', n='early')
+        # ids are in the order the elements were added, the tree walk is in document order
+        self.assertEqual(['late', 'early'], [info['element'].get('n') for info in manipulator.get_infos('b', stop_at_first=False)])
+        self.assertEqual(['early', 'late'], [element.get('n') for element in XMLQuery('b').iter(manipulator.root)])
+        self.assertEqual('late', manipulator.get_infos('b')['element'].get('n'))
+
+    def test_get_infos(self):
+        manipulator = XMLManipulator(ET.fromstring('<r><p><b x="1" y="2"/></p><b x="1"/></r>'))
+        self.assertEqual([], manipulator.get_infos('z'))
+        info = manipulator.get_infos('b', {'x': '1'})
+        self.assertEqual((manipulator.elements[3], manipulator.root), (info['element'], info['parent']))
+        info = manipulator.get_infos('b', parent_tag='p')
+        self.assertEqual((manipulator.elements[2], manipulator.elements[1]), (info['element'], info['parent']))
+        self.assertEqual({'element': manipulator.root, 'parent': None}, manipulator.get_infos('r'))
+
+    def test_invalid_paths(self):
+        for path in ['', 'a b/', 'a[@x="1"', 'a//']:
+            with self.subTest(path=path):
+                self.assertRaises(ValueError, XMLQuery, path)
+
+
+def snapshot(manipulator: XMLManipulator) -> tuple:
+    return (manipulator.get_string(False), dict(manipulator.elements), dict(manipulator._element_ids), dict(manipulator._parent_ids),
+            {tag: set(ids) for tag, ids in manipulator._tag_index.items()}, manipulator._next_id)
+
+
+class XMLBatchTest(unittest.TestCase):
+
+    def queue_random_changes(self, batch, twin: XMLManipulator, rand: random.Random, count: int) -> None:
+        """Queues random changes in `batch` and applies the same changes directly to `twin`"""
+        for _ in range(count):
+            ids = list(twin.elements)
+            operation = rand.random()
+            if operation < 0.7:
+                args = (rand.choice(ids), rand.choice(TAGS), 'text')
+                self.assertEqual(twin.add(*args, x='0'), batch.add(*args, x='0'))
+            elif operation < 0.85:
+                args = (rand.choice(ids), rand.choice(TAGS), 'new')
+                twin.update(*args, x='1')
+                batch.update(*args, x='1')
+            elif len(ids) > 1:
+                id = rand.choice(ids[1:])
+                twin.remove(id)
+                batch.remove(id)
+
+    def test_commit_matches_single_changes(self):
+        for seed in range(10):
+            rand = random.Random(seed)
+            manipulator = XMLManipulator(ET.fromstring('<r><a><b/></a><c/></r>'))
+            twin = XMLManipulator(ET.fromstring('<r><a><b/></a><c/></r>'))
+            with manipulator.batch() as batch:
+                self.queue_random_changes(batch, twin, rand, 100)
+            self.assertEqual(twin.get_string(False), manipulator.get_string(False))
+            self.assertEqual(twin._next_id, manipulator._next_id)
+            self.assertEqual(list(twin.query('*')), list(manipulator.query('*')))
+            XMLManipulatorTest.assertTablesMatchTree(self, manipulator)
+
+    def test_failed_commit_rolls_back(self):
+        for seed in range(10):
+            rand = random.Random(seed)
+            manipulator = XMLManipulator(ET.fromstring('<r><a><b/></a><c/></r>'))
+            random_changes(manipulator, rand, 20)
+            twin = copy.deepcopy(manipulator)
+            elements = manipulator.elements
+            before = snapshot(manipulator)
+
+            batch = manipulator.batch()
+            self.queue_random_changes(batch, twin, rand, 50)
+            batch.remove(10 ** 6)
+            self.queue_random_changes(batch, twin, rand, 5)
+            with self.assertRaisesRegex(IndexError, 'The element does not exist'):
+                batch.commit()
+
+            self.assertEqual(before, snapshot(manipulator))
+            self.assertIs(elements, manipulator.elements)
+            self.assertEqual(0, len(batch))
+            XMLManipulatorTest.assertTablesMatchTree(self, manipulator)
+            self.assertEqual(before[-1], manipulator.add(0, 'a'))
+
+    def test_missing_parent(self):
+        manipulator = new_xml()
+        before = snapshot(manipulator)
+        with self.assertRaises(IndexError):
+            with manipulator.batch() as batch:
+                batch.add(0, 'a')
+                batch.add(10 ** 6, 'b')
+        self.assertEqual(before, snapshot(manipulator))
+
+    def test_exception_discards_batch(self):
+        manipulator = new_xml()
+        before = snapshot(manipulator)
+        with self.assertRaises(KeyError):
+            with manipulator.batch() as batch:
+                batch.add(0, 'a')
+                raise KeyError()
+        self.assertEqual(before, snapshot(manipulator))
+
+    def test_changed_manipulator(self):
+        manipulator = new_xml()
+        batch = manipulator.batch()
+        batch.add(0, 'a')
+        manipulator.add(0, 'b')
+        self.assertRaises(RuntimeError, batch.commit)
+
+
+if __name__ == '__main__':
+    unittest.main()